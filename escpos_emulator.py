@@ -0,0 +1,306 @@
+"""ESC/POS 프린터 에뮬레이터
+
+ThermalPrinter 가 시리얼 포트로 보내는 바이트 스트림을 그대로 받아서
+(ESC @, ESC 3 n, GS v 0 래스터, LF, GS V 절단) 용지 한 장(절단 단위)씩 PNG 로 그려내고,
+보레이트/헤드 속도/라인 수로 실제 인쇄 시간을 추정합니다.
+영수증 용지 없이 인코더나 대기 시간(pacing) 변경의 실제 처리량 영향을 비교할 때 사용합니다.
+
+    emulator = EscPosEmulator()
+    printer = ThermalPrinter(port=emulator)
+    printer.print_image('print_double_frame.png')
+    emulator.save_pages('out/page')
+    print(emulator.stats())
+
+시간 모델:
+    - 전송: 8N1 기준 바이트당 10비트, bytes * 10 / baudrate 초
+    - 인쇄/급지: 도트 라인당 1 / (head_speed_mm_s * dots_per_mm) 초
+    - 절단: cut_seconds
+    - 프린터는 수신 버퍼(buffer_size)만큼 앞서 받을 수 있고, 그 이상은 XON/XOFF 로 호스트를 멈춘다고 가정
+    - ThermalPrinter 의 대기(cut_paper 의 sleep 등)는 idle() 로 호스트 시계에만 더해짐
+"""
+import os
+
+import numpy as np
+from PIL import Image
+
+ESC = 0x1B
+GS = 0x1D
+LF = 0x0A
+
+
+class EscPosEmulator:
+    def __init__(self, baudrate=115200, head_speed_mm_s=200, dots_per_mm=8, max_width=576,
+                 default_line_spacing=30, cut_seconds=0.5, buffer_size=4096):
+        self.baudrate = baudrate
+        self.head_speed_mm_s = head_speed_mm_s
+        self.dots_per_mm = dots_per_mm
+        self.max_width = max_width  # 72mm * 8dots/mm = 576 dots
+        self.default_line_spacing = default_line_spacing
+        self.cut_seconds = cut_seconds
+        self.buffer_size = buffer_size
+        self.is_open = True
+        self.in_waiting = 0
+        self.reset_stats()
+
+    # ---- 시리얼 호환 인터페이스 (ThermalPrinter.printer_dev 로 사용) ----
+
+    def write(self, data):
+        data = bytes(data)
+        # 이번 write 의 바이트들은 현재 호스트 시각부터 연속으로 전송됨
+        self._segments.append((self._received, self.host_clock))
+        self._received += len(data)
+        self.host_clock += len(data) * self.byte_seconds
+        self.bytes_received += len(data)
+        self._buffer.extend(data)
+        self._parse()
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def read(self, size=1):
+        return b''
+
+    def close(self):
+        self.is_open = False
+
+    def idle(self, seconds):
+        """호스트가 아무것도 보내지 않고 기다린 시간 (ThermalPrinter._sleep 에서 호출)"""
+        self.host_clock += seconds
+        self.idle_seconds += seconds
+
+    # ---- 결과 ----
+
+    @property
+    def byte_seconds(self):
+        return 10 / self.baudrate
+
+    @property
+    def line_seconds(self):
+        return 1 / (self.head_speed_mm_s * self.dots_per_mm)
+
+    def reset_stats(self):
+        """출력 페이지와 시간 통계를 모두 초기화합니다."""
+        self.line_spacing = self.default_line_spacing
+        self.pages = []
+        self.warnings = []
+        self.host_clock = 0.0
+        self.mech_clock = 0.0
+        self.idle_seconds = 0.0
+        self.bytes_received = 0
+        self.dot_lines = 0
+        self.cuts = 0
+        self._rows = []
+        self._buffer = bytearray()
+        self._offset = 0  # _buffer[0] 의 전체 스트림 기준 위치
+        self._received = 0
+        self._segments = []
+
+    def finish(self):
+        """절단되지 않고 남은 출력을 마지막 페이지로 확정합니다."""
+        if self._buffer:
+            self.warnings.append(f"완료되지 않은 명령 {len(self._buffer)} bytes 무시")
+            self._consume(len(self._buffer))
+        if self._rows:
+            self._end_page()
+        return self.pages
+
+    def save_pages(self, prefix):
+        """페이지를 '<prefix>_1.png', '<prefix>_2.png' ... 로 저장하고 경로 목록을 돌려줍니다."""
+        self.finish()
+        directory = os.path.dirname(prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        paths = []
+        for i, page in enumerate(self.pages, 1):
+            path = f"{prefix}_{i}.png"
+            page.save(path)
+            paths.append(path)
+        return paths
+
+    def stats(self):
+        transmit_seconds = self.bytes_received * self.byte_seconds
+        total_seconds = max(self.host_clock, self.mech_clock)
+        return {
+            'bytes': self.bytes_received,
+            'pages': len(self.pages) + (1 if self._rows else 0),
+            'cuts': self.cuts,
+            'dot_lines': self.dot_lines,
+            'paper_mm': self.dot_lines / self.dots_per_mm,
+            'transmit_seconds': transmit_seconds,
+            'mechanical_seconds': self.dot_lines * self.line_seconds + self.cuts * self.cut_seconds,
+            'idle_seconds': self.idle_seconds,
+            'total_seconds': total_seconds,
+        }
+
+    # ---- 파서 ----
+
+    def _arrival(self, offset):
+        """스트림 위치 offset 의 바이트가 프린터에 도착 완료한 시각"""
+        start_offset, start_time = self._segments[0]
+        for seg_offset, seg_time in self._segments:
+            if seg_offset > offset:
+                break
+            start_offset, start_time = seg_offset, seg_time
+        return start_time + (offset - start_offset + 1) * self.byte_seconds
+
+    def _consume(self, length):
+        del self._buffer[:length]
+        self._offset += length
+        # 이미 다 읽은 write 구간 정리
+        while len(self._segments) > 1 and self._segments[1][0] <= self._offset:
+            self._segments.pop(0)
+
+    def _parse(self):
+        while self._buffer:
+            length = self._command_length()
+            if length is None:
+                return  # 나머지 바이트가 아직 도착하지 않음
+            command = bytes(self._buffer[:length])
+            ready_at = self._arrival(self._offset + length - 1)
+            self._execute(command, ready_at)
+            self._consume(length)
+
+    def _command_length(self):
+        """버퍼 앞의 명령 길이. 아직 다 받지 못했으면 None"""
+        buf = self._buffer
+        first = buf[0]
+        if first == ESC:
+            if len(buf) < 2:
+                return None
+            if buf[1] == 0x33:  # ESC 3 n
+                return 3 if len(buf) >= 3 else None
+            return 2
+        if first == GS:
+            if len(buf) < 2:
+                return None
+            if buf[1] == 0x76:  # GS v 0 m xL xH yL yH d1...dk
+                if len(buf) < 8:
+                    return None
+                width_bytes = buf[4] | (buf[5] << 8)
+                height = buf[6] | (buf[7] << 8)
+                length = 8 + width_bytes * height
+                return length if len(buf) >= length else None
+            if buf[1] == 0x56:  # GS V m [n]
+                if len(buf) < 3:
+                    return None
+                if buf[2] in (65, 66):
+                    return 4 if len(buf) >= 4 else None
+                return 3
+            return 2
+        return 1
+
+    def _execute(self, command, ready_at):
+        if command[0] == ESC:
+            if command[1] == 0x40:  # ESC @
+                self.line_spacing = self.default_line_spacing
+            elif command[1] == 0x33:  # ESC 3 n
+                self.line_spacing = command[2]
+            else:
+                self.warnings.append(f"지원하지 않는 명령 ESC 0x{command[1]:02X}")
+        elif command[0] == GS:
+            if command[1] == 0x76:
+                self._raster(command, ready_at)
+            elif command[1] == 0x56:
+                if len(command) == 4:
+                    self._feed(command[3], ready_at)
+                self._cut(ready_at)
+            else:
+                self.warnings.append(f"지원하지 않는 명령 GS 0x{command[1]:02X}")
+        elif command[0] == LF:
+            self._feed(self.line_spacing, ready_at)
+        # 그 외 문자 데이터는 글꼴을 에뮬레이션하지 않으므로 무시
+
+    def _raster(self, command, ready_at):
+        mode = command[3]
+        width_bytes = command[4] | (command[5] << 8)
+        height = command[6] | (command[7] << 8)
+        if width_bytes == 0 or height == 0:
+            return
+        data = np.frombuffer(command[8:], dtype=np.uint8).reshape(height, width_bytes)
+        black = np.unpackbits(data, axis=1).astype(bool)
+        if mode in (1, 49):  # 가로 2배
+            black = np.repeat(black, 2, axis=1)
+        if mode in (2, 50):  # 세로 2배
+            black = np.repeat(black, 2, axis=0)
+        if mode in (3, 51):
+            black = np.repeat(np.repeat(black, 2, axis=1), 2, axis=0)
+
+        width = black.shape[1]
+        if width > self.max_width:
+            self.warnings.append(f"래스터 폭 {width} dots 가 용지 폭 {self.max_width} 을 넘어 잘림")
+            black = black[:, :self.max_width]
+        elif width < self.max_width:
+            black = np.pad(black, ((0, 0), (0, self.max_width - width)))
+        self._rows.append(black)
+
+        # 첫 줄 데이터가 도착하면 인쇄를 시작하고, 이후엔 헤드 속도와 수신 속도 중 느린 쪽을 따름
+        lines = black.shape[0]
+        data_start = ready_at - len(command[8:]) * self.byte_seconds
+        start = max(self.mech_clock, data_start + width_bytes * self.byte_seconds)
+        self.mech_clock = max(start + lines * self.line_seconds, ready_at + self.line_seconds)
+        self.dot_lines += lines
+        self._throttle_host()
+
+    def _feed(self, dots, ready_at):
+        if dots <= 0:
+            self.mech_clock = max(self.mech_clock, ready_at)
+            return
+        self._rows.append(np.zeros((dots, self.max_width), dtype=bool))
+        self.mech_clock = max(self.mech_clock, ready_at) + dots * self.line_seconds
+        self.dot_lines += dots
+        self._throttle_host()
+
+    def _cut(self, ready_at):
+        self.mech_clock = max(self.mech_clock, ready_at) + self.cut_seconds
+        self.cuts += 1
+        self._end_page()
+        self._throttle_host()
+
+    def _throttle_host(self):
+        # 수신 버퍼가 가득 차면 XOFF 로 호스트 전송이 멈추므로, 호스트는 버퍼 분량 이상 앞서갈 수 없음
+        lead = self.buffer_size * self.byte_seconds
+        self.host_clock = max(self.host_clock, self.mech_clock - max(lead, self.line_seconds))
+
+    def _end_page(self):
+        if self._rows:
+            black = np.vstack(self._rows)
+        else:
+            black = np.zeros((0, self.max_width), dtype=bool)
+        self._rows = []
+        if black.shape[0] == 0:
+            return
+        page = Image.fromarray(np.where(black, 0, 255).astype(np.uint8), 'L').convert('1')
+        self.pages.append(page)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="ESC/POS 바이트 스트림을 PNG 로 그리고 인쇄 시간을 추정")
+    parser.add_argument('input', help="인쇄할 이미지 또는 캡처한 바이트 스트림(.bin)")
+    parser.add_argument('--out', default='emulated/page', help="PNG 저장 경로 접두사")
+    parser.add_argument('--copies', type=int, default=1)
+    parser.add_argument('--baudrate', type=int, default=115200)
+    parser.add_argument('--head-speed', type=float, default=200, help="헤드 속도 (mm/s)")
+    parser.add_argument('--cut-seconds', type=float, default=0.5)
+    args = parser.parse_args()
+
+    emulator = EscPosEmulator(baudrate=args.baudrate, head_speed_mm_s=args.head_speed,
+                              cut_seconds=args.cut_seconds)
+    if args.input.endswith('.bin'):
+        with open(args.input, 'rb') as f:
+            emulator.write(f.read())
+    else:
+        from thermal_printer import ThermalPrinter
+        printer = ThermalPrinter(port=emulator, baudrate=args.baudrate)
+        printer.print_image(args.input, args.copies)
+
+    for path in emulator.save_pages(args.out):
+        print(f"저장: {path}")
+    for warning in emulator.warnings:
+        print(f"경고: {warning}")
+    stats = emulator.stats()
+    print(f"{stats['bytes']} bytes, {stats['pages']} 페이지, 용지 {stats['paper_mm']:.0f}mm")
+    print(f"전송 {stats['transmit_seconds']:.2f}초 / 인쇄·급지·절단 {stats['mechanical_seconds']:.2f}초 / "
+          f"대기 {stats['idle_seconds']:.2f}초 → 예상 총 {stats['total_seconds']:.2f}초")
@@ -2,26 +2,22 @@ from PIL import Image, ImageDraw, ImageOps, ImageFont
 import os
 
 class PhotoFrameMaker:
-    def __init__(self):
-        font_path = "Binggrae.ttf"
+    def __init__(self, font_path="Binggrae.ttf"):
         if not os.path.exists(font_path):
-            raise Exception("Binggrae.ttf 폰트 파일이 필요합니다.")
+            raise Exception(f"{font_path} 폰트 파일이 필요합니다.")
         
         self.title_font = ImageFont.truetype(font_path, 28)
         self.content_font = ImageFont.truetype(font_path, 32)
 
-    def create_double_frame(self, image1_path, image2_path, text=None):
+    def create_double_frame(self, image1_path, image2_path, text=None, save_path="print_double_frame.png"):
         try:
-            # 이미지 열기
-            img1 = Image.open(image1_path)
-            img2 = Image.open(image2_path)
-            
-            # 각 이미지 리사이징
             base_width = 576  # 72mm * 8dots/mm = 576 dots
-            base_height = int((base_width * img1.height) / img1.width)
             
-            img1 = img1.resize((base_width, base_height), Image.Resampling.LANCZOS)
-            img2 = img2.resize((base_width, base_height), Image.Resampling.LANCZOS)
+            # 이미지 열기 및 리사이징 (파일 핸들은 리사이즈 후 바로 닫음)
+            with Image.open(image1_path) as src1, Image.open(image2_path) as src2:
+                base_height = int((base_width * src1.height) / src1.width)
+                img1 = src1.resize((base_width, base_height), Image.Resampling.LANCZOS)
+                img2 = src2.resize((base_width, base_height), Image.Resampling.LANCZOS)
             
             # 여백 설정
             spacing = 40  # 사진 간격 0.5cm
@@ -56,21 +52,22 @@ class PhotoFrameMaker:
             )
             
             # 이미지 저장
-            save_path = "print_double_frame.png"
             new_img.save(save_path)
             return save_path
             
         except Exception as e:
             raise Exception(f"프레임 생성 중 오류 발생: {str(e)}")
 
-    def create_frame(self, image_path, text=None):
-        """기존의 단일 이미지 프레임 생성 메소드 (하위 호환성 유지)"""
+    def create_frame(self, image_path, text=None, save_path=None):
+        """기존의 단일 이미지 프레임 생성 메소드 (하위 호환성 유지)
+
+        save_path 를 주지 않으면 현재 디렉터리에 'print_<파일 이름>' 으로 저장합니다.
+        """
         try:
-            img = Image.open(image_path)
-            
             base_width = 576
-            base_height = int((base_width * img.height) / img.width)
-            img = img.resize((base_width, base_height), Image.Resampling.LANCZOS)
+            with Image.open(image_path) as src:
+                base_height = int((base_width * src.height) / src.width)
+                img = src.resize((base_width, base_height), Image.Resampling.LANCZOS)
             
             text_area_height = 120
             new_img = ImageOps.expand(img, border=(0, 0, 0, text_area_height), fill="white")
@@ -91,7 +88,8 @@ class PhotoFrameMaker:
                 align="center"
             )
             
-            save_path = "print_" + os.path.basename(image_path)
+            if save_path is None:
+                save_path = "print_" + os.path.basename(image_path)
             new_img.save(save_path)
             return save_path
             
@@ -17,24 +17,35 @@ from PyQt5.QtGui import (
 import numpy as np
 from frame_maker import PhotoFrameMaker
 from thermal_printer import ThermalPrinter
+from print_server import PrintServer
+
+# 태블릿/다른 포토 스테이션에서 인쇄 작업을 받는 서버 설정 (환경 변수, 기본값은 꺼짐)
+PRINT_SERVER_ENABLED = os.environ.get('RECEIPT_PRINT_SERVER', '') == '1'
+PRINT_SERVER_HOST = os.environ.get('RECEIPT_PRINT_SERVER_HOST', '0.0.0.0')
+PRINT_SERVER_PORT = os.environ.get('RECEIPT_PRINT_SERVER_PORT', '8765')  # startPrintServer 에서 숫자로 변환
+PRINT_SERVER_TOKEN = os.environ.get('RECEIPT_PRINT_SERVER_TOKEN', '')
 
 class CountdownThread(QThread):
     update_signal = pyqtSignal(int)
     finished_signal = pyqtSignal()
     
+    def __init__(self, interval=1):
+        super().__init__()
+        self.interval = interval  # 카운트 사이 간격 (초)
+        
     def run(self):
         for i in range(5, 0, -1):
             self.update_signal.emit(i)
-            time.sleep(1)
+            time.sleep(self.interval)
         self.finished_signal.emit()
 
 class CameraThread(QThread):
     change_pixmap_signal = pyqtSignal(np.ndarray)
     
-    def __init__(self):
+    def __init__(self, cap=None):
         super().__init__()
         self.running = True
-        self.cap = None
+        self.cap = cap  # None 이면 run() 에서 웹캠을 엶
         self.preview_mode = False
         
     def run(self):
@@ -70,16 +81,66 @@ class CameraThread(QThread):
             self.cap.release()
         self.wait()
 
+class PrintThread(QThread):
+    finished_signal = pyqtSignal()
+    error_signal = pyqtSignal(str)
+    
+    def __init__(self, frame_maker, printer):
+        super().__init__()
+        self.frame_maker = frame_maker
+        self.printer = printer
+        self.images = []
+        self.text = ''
+        self.copies = 1
+        
+    def run(self):
+        # 원격 작업이 프린터를 쓰는 동안 기다리는 것도 이 스레드에서 일어나므로 UI 는 멈추지 않음
+        framed_image_path = None
+        try:
+            # 두 이미지를 하나의 프레임으로 만들기
+            framed_image_path = self.frame_maker.create_double_frame(
+                self.images[0],
+                self.images[1],
+                self.text
+            )
+            
+            # 이미지 인쇄
+            self.printer.print_image(framed_image_path, self.copies)
+        except Exception as e:
+            # 실패한 경우 다시 인쇄할 수 있도록 촬영 사진은 남김
+            self._remove_files([framed_image_path])
+            self.error_signal.emit(str(e))
+            return
+        
+        # 임시 파일 삭제
+        self._remove_files(self.images + [framed_image_path])
+        self.finished_signal.emit()
+    
+    def _remove_files(self, files):
+        for file in files:
+            try:
+                if file and os.path.exists(file):
+                    os.remove(file)
+            except Exception as e:
+                print(f"파일 삭제 중 오류 발생: {str(e)}")
+
 class PhotoPrinterApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, frame_maker=None, printer=None, camera=None, countdown_interval=1, shot_delay=5):
+        """frame_maker, printer, camera 를 넘기면 기본 폰트/COM7/웹캠 대신 사용 (soak.py 등)"""
         super().__init__()
         self.captured_images = []  # 두 장의 사진을 저장할 리스트
         self.current_capture = 0   # 현재 촬영 중인 사진 번호
-        self.frame_maker = PhotoFrameMaker()
-        self.printer = ThermalPrinter()
+        self.camera = camera
+        self.countdown_interval = countdown_interval
+        self.shot_delay = shot_delay  # 첫 번째 사진 후 두 번째 카운트다운까지 대기 (초)
+        self.frame_maker = frame_maker or PhotoFrameMaker()
+        self.printer = printer or ThermalPrinter()
+        self.print_server = None
         
         self.initUI()
         self.startCamera()
+        if PRINT_SERVER_ENABLED:
+            self.startPrintServer()
         self.showMaximized()
 
     def initUI(self):
@@ -279,10 +340,15 @@ class PhotoPrinterApp(QMainWindow):
         layout.addWidget(input_container)
         
         # 카운트다운 스레드
-        self.countdown_thread = CountdownThread()
+        self.countdown_thread = CountdownThread(self.countdown_interval)
         self.countdown_thread.update_signal.connect(self.update_countdown)
         self.countdown_thread.finished_signal.connect(self.capture_image)
         
+        # 인쇄 스레드 (프린터 전송 중에도 UI 가 멈추지 않도록)
+        self.print_thread = PrintThread(self.frame_maker, self.printer)
+        self.print_thread.finished_signal.connect(self.print_finished)
+        self.print_thread.error_signal.connect(self.print_failed)
+        
         # 키보드 포커스 정책 설정
         self.setFocusPolicy(Qt.StrongFocus)
         
@@ -339,8 +405,21 @@ class PhotoPrinterApp(QMainWindow):
         ]
         return random.choice(messages)
 
+    def startPrintServer(self):
+        try:
+            # 잘못된 포트 값이어도 import 단계에서 키오스크가 죽지 않도록 여기서 변환
+            port = int(PRINT_SERVER_PORT)
+            self.print_server = PrintServer(
+                self.printer, PRINT_SERVER_HOST, port, token=PRINT_SERVER_TOKEN
+            )
+            self.print_server.start()
+        except Exception as e:
+            # 서버 없이도 키오스크 촬영/인쇄는 계속 동작해야 함
+            print(f"인쇄 작업 서버를 시작하지 않습니다: {str(e)}")
+            self.print_server = None
+
     def startCamera(self):
-        self.camera_thread = CameraThread()
+        self.camera_thread = CameraThread(self.camera)
         self.camera_thread.change_pixmap_signal.connect(self.update_image)
         self.camera_thread.start()
 
@@ -365,9 +444,9 @@ class PhotoPrinterApp(QMainWindow):
         self.start_countdown()
 
     def start_countdown(self):
-        self.countdown_thread = CountdownThread()
-        self.countdown_thread.update_signal.connect(self.update_countdown)
-        self.countdown_thread.finished_signal.connect(self.capture_image)
+        # initUI 에서 만든 스레드를 재사용 (촬영마다 새 QThread 를 만들지 않음)
+        # finished_signal 직후에는 스레드가 아직 종료 중일 수 있으므로 끝날 때까지 기다린 뒤 다시 시작
+        self.countdown_thread.wait()
         self.countdown_thread.start()
 
     @pyqtSlot(int)
@@ -391,8 +470,8 @@ class PhotoPrinterApp(QMainWindow):
                 if self.current_capture == 0:
                     self.preview_label1.setPixmap(preview_img)
                     self.current_capture = 1
-                    self.countdown_label.setText('5초 후 두 번째 사진')
-                    time.sleep(5)  # 5초 대기
+                    self.countdown_label.setText(f'{self.shot_delay}초 후 두 번째 사진')
+                    time.sleep(self.shot_delay)  # 5초 대기
                     self.start_countdown()
                 else:
                     self.preview_label2.setPixmap(preview_img)
@@ -419,52 +498,59 @@ class PhotoPrinterApp(QMainWindow):
         self.preview_label2.setPixmap(blank_pixmap)
 
     def print_image(self):
-        try:
-            # 두 이미지를 하나의 프레임으로 만들기
-            framed_image_path = self.frame_maker.create_double_frame(
-                self.captured_images[0],
-                self.captured_images[1],
-                self.text_input.text()
-            )
-            
-            # 이미지 인쇄
-            copies = self.copies_spinbox.value()
-            self.printer.print_image(framed_image_path, copies)
-            
-            QMessageBox.information(self, '완료', '인쇄가 완료되었습니다.')
-            
-            # UI 초기화
-            self.camera_thread.preview_mode = False
-            self.stack.setCurrentIndex(0)  # 카메라 뷰로 전환
-            self.capture_btn.setEnabled(True)
-            self.print_btn.setEnabled(False)
-            self.recapture_btn.setEnabled(False)
-            
-            # 미리보기 레이블 초기화
-            blank_pixmap = QPixmap(400, 300)
-            blank_pixmap.fill(Qt.black)
-            self.preview_label1.setPixmap(blank_pixmap)
-            self.preview_label2.setPixmap(blank_pixmap)
-            
-            # 상태 초기화
-            self.captured_images = []
-            self.current_capture = 0
-            
-            # 임시 파일 삭제
-            for file in self.captured_images + [framed_image_path]:
-                try:
-                    if os.path.exists(file):
-                        os.remove(file)
-                except Exception as e:
-                    print(f"파일 삭제 중 오류 발생: {str(e)}")
-            
-        except Exception as e:
-            QMessageBox.critical(self, '에러', f'인쇄 중 오류가 발생했습니다: {str(e)}')
+        # 인쇄 버튼은 인쇄 중 비활성화되므로, 여기서 기다리는 건 직전 스레드의 종료 처리뿐임
+        self.print_thread.wait()
+        
+        # 인쇄는 PrintThread 에서 진행하고 끝나면 print_finished / print_failed 가 호출됨
+        self.print_thread.images = list(self.captured_images)
+        self.print_thread.text = self.text_input.text()
+        self.print_thread.copies = self.copies_spinbox.value()
+        
+        self.print_btn.setEnabled(False)
+        self.recapture_btn.setEnabled(False)
+        self.countdown_label.setText('인쇄 중...')
+        self.print_thread.start()
+
+    @pyqtSlot()
+    def print_finished(self):
+        self.countdown_label.setText('')
+        QMessageBox.information(self, '완료', '인쇄가 완료되었습니다.')
+        
+        # UI 초기화
+        self.camera_thread.preview_mode = False
+        self.stack.setCurrentIndex(0)  # 카메라 뷰로 전환
+        self.capture_btn.setEnabled(True)
+        self.print_btn.setEnabled(False)
+        self.recapture_btn.setEnabled(False)
+        
+        # 미리보기 레이블 초기화
+        blank_pixmap = QPixmap(400, 300)
+        blank_pixmap.fill(Qt.black)
+        self.preview_label1.setPixmap(blank_pixmap)
+        self.preview_label2.setPixmap(blank_pixmap)
+        
+        # 상태 초기화 (임시 파일은 PrintThread 에서 삭제함)
+        self.captured_images = []
+        self.current_capture = 0
+
+    @pyqtSlot(str)
+    def print_failed(self, message):
+        self.countdown_label.setText('')
+        self.print_btn.setEnabled(True)
+        self.recapture_btn.setEnabled(True)
+        QMessageBox.critical(self, '에러', f'인쇄 중 오류가 발생했습니다: {message}')
 
     def closeEvent(self, event):
         # 카메라 정지
         self.camera_thread.stop()
         
+        # 진행 중인 인쇄가 끝날 때까지 대기
+        self.print_thread.wait()
+        
+        # 원격 인쇄 작업 서버 정지
+        if self.print_server is not None:
+            self.print_server.stop()
+        
         # 임시 파일 삭제
         for file in self.captured_images:
             try:
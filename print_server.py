@@ -0,0 +1,458 @@
+"""원격 인쇄 작업 서버
+
+직원용 태블릿이나 다른 포토 스테이션에서 키오스크 프린터로 이미지를 보낼 수 있도록
+asyncio 기반의 작은 HTTP 서버를 제공합니다.
+
+    POST /jobs?caption=...&copies=2          (Content-Type: image/png, image/jpeg ...)
+    POST /jobs?width_bytes=72&height=800     (Content-Type: application/octet-stream, GS v 0 래스터)
+    GET  /jobs                               전체 작업 상태
+    GET  /jobs/<id>                          작업 상태
+
+모든 요청에는 X-Print-Token 헤더로 공유 비밀 값을 보내야 합니다.
+작업은 크기가 제한된 큐에 들어가고 하나의 워커가 순서대로 인쇄합니다.
+큐가 가득 차면 503 과 Retry-After 로 거절하므로 클라이언트끼리, 그리고 키오스크 UI 를 막지 않습니다.
+토큰이 틀리거나 큐가 가득 찬 요청의 본문은 저장하지 않고 조금씩 읽어서 버립니다.
+동시 연결 수(max_connections)와 요청 헤더 수신 시간(read_timeout)도 제한합니다.
+로컬 테스트는 ThermalPrinter(port=EscPosEmulator()) 를 프린터로 넘기면 됩니다.
+"""
+import asyncio
+import hmac
+import io
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from frame_maker import PhotoFrameMaker
+
+CAPTION_HEIGHT = 120  # 래스터 작업 아래에 붙는 문구 영역 (frame_maker 의 text_area_height 와 같음)
+MAX_RASTER_HEIGHT = 0xFFFF  # GS v 0 의 높이 필드는 16비트
+MAX_HEADER_LINES = 100
+DISCARD_CHUNK = 64 * 1024
+
+STATUS_TEXT = {
+    200: 'OK',
+    202: 'Accepted',
+    400: 'Bad Request',
+    401: 'Unauthorized',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    408: 'Request Timeout',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class PrintJob:
+    def __init__(self, job_id, kind, payload, caption, copies, client):
+        self.id = job_id
+        self.kind = kind  # 'image' 또는 'raster'
+        self.payload = payload
+        self.caption = caption
+        self.copies = copies
+        self.client = client
+        self.status = 'queued'  # queued -> printing -> done / failed
+        self.error = None
+        self.width_bytes = None
+        self.height = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'caption': self.caption,
+            'copies': self.copies,
+            'status': self.status,
+            'error': self.error,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class PrintServer:
+    def __init__(self, printer, host='0.0.0.0', port=8765, font_path="Binggrae.ttf", token=None,
+                 max_queue=8, max_body=8 * 1024 * 1024, max_pixels=20 * 1000 * 1000, max_copies=10,
+                 read_timeout=10, history=100, max_connections=16):
+        if not token:
+            raise Exception("인쇄 작업 서버에는 공유 비밀 값(token)이 필요합니다.")
+        self.printer = printer
+        self.host = host
+        self.port = port
+        self.token = token
+        # UI 스레드의 PhotoFrameMaker 와 폰트 객체를 공유하지 않도록 따로 만듦
+        self.frame_maker = PhotoFrameMaker(font_path)
+        self.max_queue = max_queue
+        self.max_body = max_body
+        self.max_pixels = max_pixels  # 키오스크 프로세스에서 디코딩할 이미지 크기 제한
+        self.max_copies = max_copies
+        self.read_timeout = read_timeout
+        self.history = history
+        self.max_connections = max_connections
+        self.work_dir = tempfile.mkdtemp(prefix='receipt_jobs_')
+
+        self.jobs = OrderedDict()
+        self._ids = itertools.count(1)
+        self._queue = None
+        self._loop = None
+        self._stop_event = None
+        self._thread = None
+        self._connections = 0
+        self._ready = threading.Event()
+        self._error = None
+
+    # ---- 실행/종료 ----
+
+    def start(self, timeout=5):
+        """별도 스레드에서 이벤트 루프를 돌려 서버를 시작합니다. (키오스크 UI 를 막지 않음)
+
+        포트 바인딩 실패 등으로 시작하지 못하면 예외를 발생시킵니다.
+        """
+        self._ready.clear()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise Exception(f"인쇄 작업 서버 시작 시간 초과 ({self.host}:{self.port})")
+        if self._error is not None:
+            self.stop()
+            raise Exception(f"인쇄 작업 서버 시작 실패 ({self.host}:{self.port}): {self._error}")
+
+    def _run(self):
+        try:
+            asyncio.run(self.serve())
+        except Exception as e:
+            self._error = e
+        finally:
+            # 실패한 경우에도 start() 가 바로 깨어나도록 함
+            self._ready.set()
+
+    def stop(self):
+        # 시작에 실패했거나 이미 멈춘 경우 이벤트 루프는 닫혀 있음
+        if self._thread is not None and self._thread.is_alive() and self._stop_event is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._stop_event.set)
+            except RuntimeError:
+                pass
+        if self._thread is not None:
+            self._thread.join(5)
+        # 처리 중이던 작업 임시 파일까지 정리
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]  # port=0 이면 실제 포트로 갱신
+        worker = asyncio.create_task(self._worker())
+        self._ready.set()
+        print(f"인쇄 작업 서버 시작: {self.host}:{self.port}")
+        try:
+            async with server:
+                await self._stop_event.wait()
+        finally:
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+
+    # ---- 인쇄 워커 ----
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = 'printing'
+            job.started_at = time.time()
+            try:
+                # 시리얼 전송은 블로킹이므로 스레드 풀에서 실행 (이벤트 루프는 계속 요청을 받음)
+                await self._loop.run_in_executor(None, self._run_job, job)
+                job.status = 'done'
+            except Exception as e:
+                job.status = 'failed'
+                job.error = str(e)
+            finally:
+                job.payload = None
+                job.finished_at = time.time()
+                self._queue.task_done()
+
+    def _run_job(self, job):
+        if job.kind == 'raster':
+            data, height = job.payload, job.height
+            if job.caption:
+                caption_data, caption_height = self._caption_raster(job.caption, job.width_bytes)
+                data = data + caption_data
+                height += caption_height
+            self.printer.print_raster(data, job.width_bytes, height, job.copies)
+            return
+
+        image_path = os.path.join(self.work_dir, f'remote_job_{job.id}.png')
+        framed_image_path = None
+        try:
+            with open(image_path, 'wb') as f:
+                f.write(job.payload)
+            # 키오스크의 현재 디렉터리가 아니라 작업 디렉터리에 저장
+            framed_image_path = self.frame_maker.create_frame(
+                image_path, job.caption, os.path.join(self.work_dir, f'print_remote_job_{job.id}.png'))
+            self.printer.print_image(framed_image_path, job.copies)
+        finally:
+            for file in [image_path, framed_image_path]:
+                try:
+                    if file and os.path.exists(file):
+                        os.remove(file)
+                except Exception as e:
+                    print(f"파일 삭제 중 오류 발생: {str(e)}")
+
+    def _caption_raster(self, text, width_bytes, text_area_height=CAPTION_HEIGHT):
+        """래스터 작업 아래에 붙일 문구 영역을 GS v 0 형식으로 만듭니다."""
+        width = width_bytes * 8
+        img = Image.new('1', (width, text_area_height), 1)
+        draw = ImageDraw.Draw(img)
+        draw.text(
+            (width // 2, text_area_height // 2),
+            text,
+            font=self.frame_maker.content_font,
+            fill=0,
+            anchor="mm",
+            align="center"
+        )
+        pixels = np.array(img)
+        return np.packbits(~pixels, axis=1).tobytes(), text_area_height
+
+    # ---- HTTP ----
+
+    async def _handle_client(self, reader, writer):
+        client = writer.get_extra_info('peername')
+        self._connections += 1
+        try:
+            if self._connections > self.max_connections:
+                # 요청을 읽지 않고 바로 거절 (느린 클라이언트가 연결을 잔뜩 잡아두는 경우)
+                status, body = 503, {'error': "동시 연결 수 제한 초과"}
+            else:
+                try:
+                    status, body = await self._handle_request(reader, client)
+                except HttpError as e:
+                    status, body = e.status, {'error': e.message}
+                except Exception as e:
+                    status, body = 500, {'error': str(e)}
+            try:
+                await self._send_response(writer, status, body)
+            finally:
+                writer.close()
+        finally:
+            self._connections -= 1
+
+    async def _handle_request(self, reader, client):
+        # 한 줄씩이 아니라 요청 줄 + 헤더 전체에 하나의 제한 시간을 둠 (한 줄씩 천천히 보내며 연결을 잡아두지 못하게)
+        try:
+            request_line, headers = await asyncio.wait_for(self._read_head(reader), self.read_timeout)
+        except asyncio.TimeoutError:
+            raise HttpError(408, "요청 헤더 수신 시간 초과")
+        except ValueError:
+            # StreamReader 의 한 줄 길이 제한(64KiB) 초과
+            raise HttpError(400, "요청 헤더가 너무 깁니다")
+
+        parts = request_line.decode('latin-1').split()
+        if len(parts) != 3:
+            raise HttpError(400, "잘못된 요청")
+        method, target, _ = parts
+        url = urlsplit(target)
+        path = url.path.rstrip('/')
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        authorized = hmac.compare_digest(headers.get('x-print-token', '').encode('utf-8'),
+                                         self.token.encode('utf-8'))
+
+        if path == '/jobs' and method == 'POST':
+            return await self._submit(reader, headers, query, client, authorized)
+        if not authorized:
+            raise HttpError(401, "X-Print-Token 이 올바르지 않습니다")
+        if path == '/jobs' and method == 'GET':
+            return 200, {'queued': self._queue.qsize(), 'jobs': [j.to_dict() for j in self.jobs.values()]}
+        if path.startswith('/jobs/') and method == 'GET':
+            job = self.jobs.get(path[len('/jobs/'):])
+            if job is None:
+                raise HttpError(404, "작업을 찾을 수 없습니다")
+            return 200, job.to_dict()
+        if path == '/jobs' or path.startswith('/jobs/'):
+            raise HttpError(405, "지원하지 않는 메소드")
+        raise HttpError(404, "경로를 찾을 수 없습니다")
+
+    async def _read_head(self, reader):
+        request_line = await reader.readline()
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                return request_line, headers
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        raise HttpError(400, f"요청 헤더가 너무 많습니다 (최대 {MAX_HEADER_LINES} 줄)")
+
+    async def _discard_body(self, reader, length):
+        """거절할 요청의 본문을 메모리에 모으지 않고 조금씩 읽어서 버립니다.
+
+        읽지 않은 데이터가 남은 채로 소켓을 닫으면 TCP RST 가 가서 클라이언트가 응답(401, 503 등)을 못 받음
+        """
+        async def discard():
+            remaining = length
+            while remaining > 0:
+                chunk = await reader.read(min(remaining, DISCARD_CHUNK))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+
+        try:
+            await asyncio.wait_for(discard(), self.read_timeout)
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+
+    async def _submit(self, reader, headers, query, client, authorized):
+        try:
+            length = int(headers.get('content-length', ''))
+        except ValueError:
+            raise HttpError(400, "Content-Length 가 필요합니다")
+        if length <= 0:
+            raise HttpError(400, "빈 작업입니다")
+        if length > self.max_body:
+            raise HttpError(413, f"작업 크기 제한 초과 ({self.max_body} bytes)")
+
+        # 헤더만으로 거절할 수 있는 요청은 본문을 저장하기 전에 거절
+        try:
+            if not authorized:
+                raise HttpError(401, "X-Print-Token 이 올바르지 않습니다")
+            try:
+                copies = int(query.get('copies', 1))
+            except ValueError:
+                raise HttpError(400, "copies 는 정수여야 합니다")
+            if not 1 <= copies <= self.max_copies:
+                raise HttpError(400, f"copies 는 1~{self.max_copies} 사이여야 합니다")
+            if self._queue.full():
+                raise HttpError(503, "인쇄 대기열이 가득 찼습니다")
+        except HttpError:
+            await self._discard_body(reader, length)
+            raise
+        caption = query.get('caption')
+
+        try:
+            payload = await asyncio.wait_for(reader.readexactly(length), self.read_timeout)
+        except asyncio.TimeoutError:
+            raise HttpError(408, "요청 본문 수신 시간 초과")
+        except asyncio.IncompleteReadError:
+            raise HttpError(400, "요청 본문이 잘렸습니다")
+
+        content_type = headers.get('content-type', '').split(';')[0].strip().lower()
+        if content_type.startswith('image/'):
+            kind = 'image'
+            # 헤더만 읽어서 크기를 먼저 확인 (큰 이미지를 디코딩하느라 키오스크 메모리를 쓰지 않도록)
+            try:
+                with Image.open(io.BytesIO(payload)) as img:
+                    width, height = img.size
+            except Exception:
+                raise HttpError(400, "이미지를 읽을 수 없습니다")
+            if width * height > self.max_pixels:
+                raise HttpError(413, f"이미지 픽셀 수 제한 초과 ({width}x{height}, 최대 {self.max_pixels})")
+            # create_frame 이 용지 폭으로 늘리므로 가늘고 긴 이미지는 GS v 0 높이를 넘거나
+            # 리사이즈 중에 거대한 이미지를 만들 수 있음 (예: 1x20000000)
+            scaled_height = self.printer.max_width * height / width
+            if not 1 <= scaled_height or scaled_height + CAPTION_HEIGHT > MAX_RASTER_HEIGHT:
+                raise HttpError(400, f"이미지 비율이 인쇄 범위를 벗어났습니다 ({width}x{height}, "
+                                     f"폭 {self.printer.max_width} 기준 문구 영역 포함 높이 최대 {MAX_RASTER_HEIGHT} dots)")
+        elif content_type == 'application/octet-stream':
+            kind = 'raster'
+            try:
+                width_bytes = int(query['width_bytes'])
+                height = int(query['height'])
+            except (KeyError, ValueError):
+                raise HttpError(400, "래스터 작업에는 width_bytes, height 가 필요합니다")
+            caption_height = CAPTION_HEIGHT if caption else 0
+            if not 0 < width_bytes <= self.printer.max_width // 8 or not 0 < height + caption_height <= MAX_RASTER_HEIGHT:
+                raise HttpError(400, "래스터 크기가 프린터 범위를 벗어났습니다 (문구 영역 포함 높이 최대 "
+                                     f"{MAX_RASTER_HEIGHT} dots)")
+            if width_bytes * height != length:
+                raise HttpError(400, "래스터 크기와 Content-Length 가 일치하지 않습니다")
+        else:
+            raise HttpError(400, "image/* 또는 application/octet-stream 만 지원합니다")
+
+        job = PrintJob(str(next(self._ids)), kind, payload, caption, copies, client)
+        if kind == 'raster':
+            job.width_bytes, job.height = width_bytes, height
+        try:
+            # 본문을 받는 동안 다른 요청이 큐를 채웠을 수 있음
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise HttpError(503, "인쇄 대기열이 가득 찼습니다")
+        self._remember(job)
+        return 202, job.to_dict()
+
+    def _remember(self, job):
+        self.jobs[job.id] = job
+        # 끝난 작업만 오래된 순서로 정리
+        while len(self.jobs) > self.history:
+            for job_id, old in self.jobs.items():
+                if old.status in ('done', 'failed'):
+                    del self.jobs[job_id]
+                    break
+            else:
+                break
+
+    async def _send_response(self, writer, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        head = [
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(data)}",
+            "Connection: close",
+        ]
+        if status == 503:
+            head.append("Retry-After: 5")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + data)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+if __name__ == '__main__':
+    import argparse
+    from thermal_printer import ThermalPrinter
+
+    parser = argparse.ArgumentParser(description="원격 인쇄 작업 서버")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--printer-port', default='COM7',
+                        help="시리얼 포트, pyserial URL 또는 'emulator' (프린터 없이 테스트)")
+    parser.add_argument('--font', default='Binggrae.ttf')
+    parser.add_argument('--token', default=os.environ.get('RECEIPT_PRINT_SERVER_TOKEN'),
+                        help="X-Print-Token 공유 비밀 값 (기본값: RECEIPT_PRINT_SERVER_TOKEN 환경 변수)")
+    args = parser.parse_args()
+
+    if args.printer_port == 'emulator':
+        from escpos_emulator import EscPosEmulator
+        printer = ThermalPrinter(port=EscPosEmulator())
+    else:
+        printer = ThermalPrinter(port=args.printer_port)
+    server = PrintServer(printer, args.host, args.port, args.font, args.token)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
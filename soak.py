@@ -0,0 +1,353 @@
+"""장시간 구동(soak) 테스트 하네스
+
+실제 카메라/프린터 없이 가짜 카메라와 ESC/POS 에뮬레이터 프린터를 끼운 PhotoPrinterApp 을
+화면 없이(QT_QPA_PLATFORM=offscreen) 띄우고, 촬영 → 프레임 생성 → 인쇄 사이클을 수천 번 반복하면서
+RSS, 열린 파일 디스크립터 수, 스레드 수를 추적합니다.
+CameraThread 의 프레임별 미리보기 QPixmap, 재사용되는 CountdownThread/PrintThread 까지 그대로 돌아갑니다.
+tracemalloc 은 사이클을 20배 가까이 느리게 만들기 때문에 마지막 --trace-cycles 사이클에서만 켜서
+사이클당 증가량과 상위 할당 위치를 봅니다.
+증가량이 기준을 넘으면 종료 코드 1 로 실패합니다.
+
+사용 예:
+    python soak.py --cycles 3000 --font Binggrae.ttf
+"""
+import argparse
+import array
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+# PyQt5 를 import 하기 전에 설정해야 함
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import QTimer, qInstallMessageHandler
+from PyQt5.QtWidgets import QApplication, QMessageBox
+
+from escpos_emulator import EscPosEmulator
+from frame_maker import PhotoFrameMaker
+from main import PhotoPrinterApp
+from thermal_printer import ThermalPrinter
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class FakeCamera:
+    """cv2.VideoCapture 와 같은 인터페이스로 합성 프레임을 돌려주는 가짜 카메라"""
+
+    def __init__(self, width=640, height=480):
+        self.width = width
+        self.height = height
+        self.frame_count = 0
+        self.opened = True
+
+    def isOpened(self):
+        return self.opened
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.width = int(value)
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.height = int(value)
+        return True
+
+    def read(self):
+        if not self.opened:
+            return False, None
+        # 프레임마다 조금씩 움직이는 그라디언트 (압축/디더링 결과가 매번 달라지도록)
+        shift = self.frame_count % 256
+        row = (np.arange(self.width, dtype=np.uint16) + shift) % 256
+        gray = np.tile(row.astype(np.uint8), (self.height, 1))
+        frame = cv2.merge([gray, np.flipud(gray), np.fliplr(gray)])
+        self.frame_count += 1
+        return True, frame
+
+    def release(self):
+        self.opened = False
+
+
+def read_rss():
+    """현재 프로세스의 RSS (bytes). 측정할 수 없으면 None"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def count_open_fds():
+    """열린 파일 디스크립터(윈도우는 핸들) 수. 측정할 수 없으면 None"""
+    if psutil is not None:
+        proc = psutil.Process()
+        if hasattr(proc, 'num_fds'):
+            return proc.num_fds()
+        return proc.num_handles()
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        return None
+
+
+def count_threads():
+    """네이티브 스레드 수 (QThread 등 파이썬 밖에서 만든 스레드 포함)"""
+    if psutil is not None:
+        return psutil.Process().num_threads()
+    try:
+        return len(os.listdir('/proc/self/task'))
+    except OSError:
+        return threading.active_count()
+
+
+def slope(samples, key):
+    """(cycle, value) 표본에 대한 최소제곱 기울기 (사이클당 증가량)"""
+    points = [(s['cycle'], s[key]) for s in samples if s[key] is not None]
+    if len(points) < 2:
+        return 0.0
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if var_x == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+
+
+def measure_growth(samples, traced_samples):
+    """워밍업 이후 RSS/fd/스레드 표본과 tracemalloc 표본에서 증가량을 계산합니다."""
+    first, last = samples[0], samples[-1]
+    return {
+        'rss_slope': slope(samples, 'rss'),
+        # 첫 추적 사이클은 캐시 등이 채워지는 구간이므로 제외
+        'traced_slope': slope(traced_samples[1:], 'traced'),
+        'fd_growth': None if first['fds'] is None or last['fds'] is None else last['fds'] - first['fds'],
+        'thread_growth': last['threads'] - first['threads'],
+    }
+
+
+def check_limits(growth, args):
+    """기준을 넘은 항목의 설명 목록을 돌려줍니다. (비어 있으면 통과)"""
+    failures = []
+    if growth['rss_slope'] > args.max_rss_per_cycle:
+        failures.append(f"RSS 사이클당 {format_bytes(growth['rss_slope'])} 증가 "
+                        f"(기준 {format_bytes(args.max_rss_per_cycle)})")
+    if growth['traced_slope'] > args.max_traced_per_cycle:
+        failures.append(f"tracemalloc 사이클당 {format_bytes(growth['traced_slope'])} 증가 "
+                        f"(기준 {format_bytes(args.max_traced_per_cycle)})")
+    if growth['fd_growth'] is not None and growth['fd_growth'] > args.max_fd_growth:
+        failures.append(f"열린 파일 디스크립터 {growth['fd_growth']}개 증가 (기준 {args.max_fd_growth})")
+    if growth['thread_growth'] > args.max_thread_growth:
+        failures.append(f"스레드 {growth['thread_growth']}개 증가 (기준 {args.max_thread_growth})")
+    return failures
+
+
+def qt_message_handler(mode, context, message):
+    # offscreen 플랫폼이 창/메시지 박스마다 출력하는 경고는 무시
+    if 'propagateSizeHints' not in message:
+        print(message)
+
+
+class SoakRunner:
+    """PhotoPrinterApp 의 버튼 동작을 그대로 호출해서 한 사이클씩 진행"""
+
+    def __init__(self, font_path, copies=1, timeout=60):
+        self.timeout = timeout
+        qInstallMessageHandler(qt_message_handler)
+        self.qt_app = QApplication.instance() or QApplication([])
+        self.emulator = EscPosEmulator()
+        self.app = PhotoPrinterApp(
+            frame_maker=PhotoFrameMaker(font_path),
+            printer=ThermalPrinter(port=self.emulator),
+            camera=FakeCamera(),
+            countdown_interval=0,
+            shot_delay=0
+        )
+        self.app.copies_spinbox.setValue(copies)
+        self.printed_bytes = 0
+        self.errors = []
+
+        # 인쇄 완료/에러 메시지 박스는 모달이라 사이클을 멈추므로 자동으로 닫음
+        self.dialog_timer = QTimer()
+        self.dialog_timer.timeout.connect(self.close_dialogs)
+        self.dialog_timer.start(10)
+
+    def close_dialogs(self):
+        for widget in QApplication.topLevelWidgets():
+            if isinstance(widget, QMessageBox) and widget.isVisible():
+                if widget.icon() == QMessageBox.Critical:
+                    self.errors.append(widget.text())
+                widget.done(0)
+
+    def wait_until(self, condition, what):
+        deadline = time.time() + self.timeout
+        while not condition():
+            if self.errors:
+                raise Exception(self.errors.pop())
+            if time.time() > deadline:
+                raise Exception(f"{what} 대기 시간 초과 ({self.timeout}초)")
+            self.qt_app.processEvents()
+            time.sleep(0.001)
+
+    def drain_printer(self):
+        """에뮬레이터에 쌓인 페이지를 비움 (안 비우면 페이지 자체가 누수처럼 보임)"""
+        self.emulator.finish()
+        self.printed_bytes += self.emulator.bytes_received
+        self.emulator.reset_stats()
+
+    def run_cycle(self, text):
+        self.wait_until(self.app.capture_btn.isEnabled, "촬영 준비")
+        self.app.start_captures()
+        self.wait_until(self.app.print_btn.isEnabled, "촬영")
+
+        self.app.text_input.setText(text)
+        self.app.print_image()
+        self.wait_until(self.app.capture_btn.isEnabled, "인쇄")
+        self.drain_printer()
+
+    def close(self):
+        self.dialog_timer.stop()
+        self.app.close()
+        self.emulator.close()
+
+
+def take_sample(cycle):
+    return {
+        'cycle': cycle,
+        'rss': read_rss(),
+        'fds': count_open_fds(),
+        'threads': count_threads(),
+    }
+
+
+def format_bytes(value):
+    if value is None:
+        return '-'
+    for unit in ['B', 'KiB', 'MiB']:
+        if abs(value) < 1024:
+            return f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{value:.1f}GiB"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="촬영/프레임/인쇄 사이클 soak 테스트")
+    parser.add_argument('--cycles', type=int, default=2000, help="반복할 사이클 수")
+    parser.add_argument('--warmup', type=int, default=50, help="측정에서 제외할 초기 사이클 수")
+    parser.add_argument('--sample-every', type=int, default=25, help="표본 수집 간격 (사이클)")
+    parser.add_argument('--trace-cycles', type=int, default=20,
+                        help="마지막에 tracemalloc 을 켜고 돌릴 사이클 수 (0 이면 생략)")
+    parser.add_argument('--trace-frames', type=int, default=1, help="tracemalloc 이 저장할 스택 깊이")
+    parser.add_argument('--copies', type=int, default=1, help="사이클당 인쇄 매수")
+    parser.add_argument('--font', default='Binggrae.ttf', help="프레임 문구용 폰트 경로")
+    parser.add_argument('--max-rss-per-cycle', type=float, default=4096,
+                        help="허용하는 사이클당 RSS 증가량 (bytes)")
+    parser.add_argument('--max-traced-per-cycle', type=float, default=1024,
+                        help="허용하는 사이클당 tracemalloc 증가량 (bytes)")
+    parser.add_argument('--max-fd-growth', type=int, default=0,
+                        help="워밍업 이후 허용하는 열린 파일 디스크립터 증가 수")
+    parser.add_argument('--max-thread-growth', type=int, default=0,
+                        help="워밍업 이후 허용하는 스레드 증가 수")
+    parser.add_argument('--top', type=int, default=10, help="출력할 tracemalloc 상위 할당 위치 수")
+    parser.add_argument('--csv', help="RSS/fd/스레드 표본을 저장할 CSV 경로")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    measured_end = args.cycles - args.trace_cycles
+    if measured_end <= args.warmup:
+        print("--cycles 는 --warmup 과 --trace-cycles 의 합보다 커야 합니다.")
+        return 2
+    if args.trace_cycles == 1:
+        print("--trace-cycles 는 0 이거나 2 이상이어야 합니다.")
+        return 2
+
+    font_path = os.path.abspath(args.font)
+    csv_path = os.path.abspath(args.csv) if args.csv else None
+    work_dir = tempfile.mkdtemp(prefix='receipt_soak_')
+    orig_cwd = os.getcwd()
+    # create_double_frame 은 현재 디렉터리에 결과를 저장하므로 작업 디렉터리를 옮김
+    os.chdir(work_dir)
+
+    runner = SoakRunner(font_path, args.copies)
+    samples = []
+    # tracemalloc 이 켜진 동안 하네스 자체가 메모리를 할당하지 않도록 미리 잡아둠
+    traced_values = array.array('q', [0] * args.trace_cycles)
+    baseline_snapshot = final_snapshot = None
+    started = time.time()
+    try:
+        for cycle in range(1, args.cycles + 1):
+            if cycle == measured_end + 1:
+                # RSS 표본 수집이 끝난 뒤에 켬 (tracemalloc 자체의 메모리가 RSS 에 섞이지 않도록)
+                tracemalloc.start(args.trace_frames)
+
+            runner.run_cycle(f"soak #{cycle}")
+
+            if args.warmup <= cycle <= measured_end and (
+                    (cycle - args.warmup) % args.sample_every == 0 or cycle == measured_end):
+                sample = take_sample(cycle)
+                samples.append(sample)
+                print(f"[{cycle}/{args.cycles}] rss={format_bytes(sample['rss'])} "
+                      f"fds={sample['fds']} threads={sample['threads']}")
+            elif cycle > measured_end:
+                traced_values[cycle - measured_end - 1] = tracemalloc.get_traced_memory()[0]
+                if cycle == measured_end + 1:
+                    # 첫 추적 사이클은 캐시 등이 채워지는 구간이므로 기준점으로만 사용
+                    baseline_snapshot = tracemalloc.take_snapshot()
+        if args.trace_cycles:
+            final_snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+        runner.close()
+        os.chdir(orig_cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    elapsed = time.time() - started
+    print(f"\n{args.cycles} 사이클 완료 ({elapsed:.1f}초, 출력 {format_bytes(runner.printed_bytes)})")
+
+    traced_samples = [{'cycle': measured_end + 1 + i, 'traced': value} for i, value in enumerate(traced_values)]
+    if final_snapshot is not None:
+        print(f"\ntracemalloc 상위 {args.top}개 증가 위치 (마지막 {args.trace_cycles - 1} 사이클):")
+        # tracemalloc 과 하네스 자신의 할당은 제외
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        stats = final_snapshot.filter_traces(ignore).compare_to(baseline_snapshot.filter_traces(ignore), 'lineno')
+        for stat in stats[:args.top]:
+            print(f"  {format_bytes(stat.size_diff):>10} ({stat.count_diff:+d} blocks)  {stat.traceback[0]}")
+
+    growth = measure_growth(samples, traced_samples)
+    failures = check_limits(growth, args)
+
+    print("\n요약:")
+    print(f"  RSS 사이클당 증가: {format_bytes(growth['rss_slope'])}")
+    print(f"  tracemalloc 사이클당 증가: {format_bytes(growth['traced_slope']) if final_snapshot else '-'}")
+    print(f"  파일 디스크립터 증가: {growth['fd_growth'] if growth['fd_growth'] is not None else '-'}")
+    print(f"  스레드 증가: {growth['thread_growth']}")
+
+    if csv_path:
+        with open(csv_path, 'w') as f:
+            f.write("cycle,rss,fds,threads\n")
+            for s in samples:
+                f.write(",".join('' if s[k] is None else str(s[k])
+                                 for k in ['cycle', 'rss', 'fds', 'threads']) + "\n")
+
+    if failures:
+        print("\n실패:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\n통과")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 저장소가 패키지가 아닌 최상위 모듈들로 되어 있으므로 루트를 import 경로에 추가
+sys.path.insert(0, ROOT)
+
+FONT_CANDIDATES = [
+    os.environ.get('RECEIPT_TEST_FONT', ''),
+    os.path.join(ROOT, 'Binggrae.ttf'),
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/Library/Fonts/Arial Unicode.ttf',
+    'C:/Windows/Fonts/malgun.ttf',
+]
+
+
+@pytest.fixture
+def font_path():
+    for path in FONT_CANDIDATES:
+        if path and os.path.exists(path):
+            return path
+    pytest.skip("폰트 파일이 없습니다 (RECEIPT_TEST_FONT 로 지정)")
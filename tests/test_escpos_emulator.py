@@ -0,0 +1,190 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from escpos_emulator import EscPosEmulator
+from thermal_printer import ThermalPrinter
+
+CUT_FEED = 64  # ThermalPrinter.cut_paper 의 GS V 65 64
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+
+
+class RecordingPort:
+    """ThermalPrinter 가 보내는 바이트를 그대로 모으는 시리얼 대용"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.is_open = True
+
+    def write(self, data):
+        self.data.extend(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def idle(self, seconds):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+def make_bitmap(height, width=576, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.random((height, width)) < 0.3  # True = 검정
+
+
+def pack(black):
+    return np.packbits(black, axis=1).tobytes()
+
+
+def page_black(page):
+    return ~np.array(page)
+
+
+def test_print_raster_round_trip():
+    black = make_bitmap(200)
+    emulator = EscPosEmulator()
+    printer = ThermalPrinter(port=emulator)
+
+    printer.print_raster(pack(black), 72, 200, copies=2)
+    pages = emulator.finish()
+
+    assert len(pages) == 2
+    for page in pages:
+        assert page.size == (576, 200 + CUT_FEED)
+        result = page_black(page)
+        assert (result[:200] == black).all()
+        assert not result[200:].any()
+    assert emulator.warnings == []
+
+
+def test_print_image_round_trip(tmp_path):
+    # 큰 흑백 블록은 보정/리사이즈/디더링을 거쳐도 거의 그대로 나와야 함
+    black = np.zeros((300, 576), dtype=bool)
+    black[40:140, 60:260] = True
+    black[180:280, 320:520] = True
+    path = tmp_path / 'blocks.png'
+    Image.fromarray(np.where(black, 0, 255).astype(np.uint8), 'L').save(path)
+
+    emulator = EscPosEmulator()
+    ThermalPrinter(port=emulator).print_image(str(path))
+    pages = emulator.finish()
+
+    assert len(pages) == 1
+    assert pages[0].size == (576, 300 + CUT_FEED)
+    result = page_black(pages[0])[:300]
+    assert (result != black).mean() < 0.02
+
+
+def test_print_image_matches_golden(tmp_path):
+    # 블록 + 가로 그라데이션: 리사이즈/보정/디더링/인코딩 중 하나라도 바뀌면 결과가 달라짐
+    # 의도한 변경이면 RECEIPT_UPDATE_GOLDEN=1 로 다시 만들어서 이미지를 확인한 뒤 커밋
+    gray = np.full((360, 576), 255, dtype=np.uint8)
+    gray[40:140, 60:260] = 0
+    gray[180:280, 320:520] = 0
+    gray[300:360] = np.linspace(0, 255, 576).astype(np.uint8)
+    path = tmp_path / 'blocks.png'
+    Image.fromarray(gray, 'L').save(path)
+
+    emulator = EscPosEmulator()
+    ThermalPrinter(port=emulator).print_image(str(path))
+    pages = emulator.finish()
+    assert len(pages) == 1
+
+    golden_path = os.path.join(GOLDEN_DIR, 'print_image_blocks.png')
+    if os.environ.get('RECEIPT_UPDATE_GOLDEN') == '1':
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        pages[0].save(golden_path)
+    with Image.open(golden_path) as golden:
+        assert pages[0].size == golden.size
+        assert (np.array(pages[0]) == np.array(golden.convert('1'))).all()
+
+
+def test_split_writes_match_single_write():
+    port = RecordingPort()
+    printer = ThermalPrinter(port=port)
+    printer.print_raster(pack(make_bitmap(40, seed=1)), 72, 40)
+    printer.print_raster(pack(make_bitmap(30, width=256, seed=2)), 32, 30)
+    stream = bytes(port.data)
+
+    whole = EscPosEmulator()
+    whole.write(stream)
+    split = EscPosEmulator()
+    for i in range(len(stream)):
+        split.write(stream[i:i + 1])
+
+    whole_pages, split_pages = whole.finish(), split.finish()
+    assert len(whole_pages) == len(split_pages) == 2
+    for a, b in zip(whole_pages, split_pages):
+        assert (np.array(a) == np.array(b)).all()
+    assert whole.stats()['dot_lines'] == split.stats()['dot_lines']
+    assert whole.stats()['transmit_seconds'] == pytest.approx(split.stats()['transmit_seconds'])
+    # 폭이 좁은 래스터는 오른쪽이 흰색으로 채워짐
+    assert split_pages[1].size == (576, 30 + CUT_FEED)
+    assert not page_black(split_pages[1])[:, 256:].any()
+
+
+def test_timing_is_transmit_bound_at_low_baud():
+    emulator = EscPosEmulator(baudrate=9600, head_speed_mm_s=200, cut_seconds=0.5)
+    emulator.write(bytes([0x1D, 0x76, 0x30, 0, 72, 0, 100, 0]) + bytes(72 * 100))
+    emulator.write(bytes([0x1D, 0x56, 0x41, 0]))
+    stats = emulator.stats()
+
+    transmit = stats['bytes'] * 10 / 9600
+    assert stats['transmit_seconds'] == pytest.approx(transmit)
+    # 헤드는 데이터가 들어오는 속도를 따라가므로 전송 시간 + 마지막 줄 + 절단
+    assert stats['total_seconds'] == pytest.approx(transmit + 1 / 1600 + 0.5, abs=1e-3)
+
+
+def test_timing_is_head_bound_at_high_baud():
+    emulator = EscPosEmulator(baudrate=10_000_000, head_speed_mm_s=100, dots_per_mm=8, cut_seconds=0.5)
+    emulator.write(bytes([0x1D, 0x76, 0x30, 0, 72, 0, 0x20, 0x03]) + bytes(72 * 800))
+    emulator.write(bytes([0x1D, 0x56, 0x41, 80]))
+    stats = emulator.stats()
+
+    assert stats['dot_lines'] == 880
+    assert stats['mechanical_seconds'] == pytest.approx(880 / 800 + 0.5)
+    assert stats['total_seconds'] == pytest.approx(880 / 800 + 0.5, rel=1e-3)
+
+
+def test_idle_time_counts_towards_total():
+    emulator = EscPosEmulator()
+    printer = ThermalPrinter(port=emulator)
+    printer.print_raster(pack(make_bitmap(10)), 72, 10, copies=2)
+    stats = emulator.stats()
+
+    # cut_paper 의 1초 + 0.5초 두 번, 매수 사이 1초
+    assert stats['idle_seconds'] == pytest.approx(4.0)
+    assert stats['total_seconds'] >= stats['idle_seconds']
+
+
+def test_line_feed_uses_line_spacing():
+    emulator = EscPosEmulator(default_line_spacing=30)
+    emulator.write([0x1B, 0x40, 0x0A])  # 기본 간격 30 dots
+    emulator.write([0x1B, 0x33, 10, 0x0A, 0x0A])  # 10 dots 두 번
+    emulator.write([0x1B, 0x33, 0, 0x0A])  # 0 dots
+    emulator.write([0x1D, 0x56, 0x00])
+
+    assert emulator.cuts == 1
+    assert [page.size for page in emulator.finish()] == [(576, 50)]
+
+
+def test_double_size_raster_mode():
+    black = make_bitmap(20, width=64, seed=3)
+    emulator = EscPosEmulator()
+    emulator.write(bytes([0x1D, 0x76, 0x30, 3, 8, 0, 20, 0]) + pack(black))
+    pages = emulator.finish()
+
+    result = page_black(pages[0])
+    assert result.shape == (40, 576)
+    assert (result[:, :128] == np.repeat(np.repeat(black, 2, axis=0), 2, axis=1)).all()
+
+
+def test_unsupported_commands_are_reported():
+    emulator = EscPosEmulator()
+    emulator.write([0x1B, 0x61, 0x1D, 0x21])
+    assert len(emulator.warnings) == 2
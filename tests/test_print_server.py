@@ -0,0 +1,264 @@
+import http.client
+import io
+import json
+import os
+import socket
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from escpos_emulator import EscPosEmulator
+from print_server import PrintServer
+from thermal_printer import ThermalPrinter
+
+TOKEN = 'secret'
+
+
+@pytest.fixture
+def emulator():
+    return EscPosEmulator()
+
+
+@pytest.fixture
+def server(font_path, emulator):
+    server = PrintServer(ThermalPrinter(port=emulator), '127.0.0.1', 0, font_path, token=TOKEN,
+                         max_queue=1, max_pixels=1000 * 1000)
+    server.start()
+    yield server
+    server.stop()
+
+
+def request(server, method, path, body=None, content_type=None, token=TOKEN):
+    conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=10)
+    headers = {}
+    if token is not None:
+        headers['X-Print-Token'] = token
+    if content_type:
+        headers['Content-Type'] = content_type
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    result = response.status, json.loads(response.read()), dict(response.getheaders())
+    conn.close()
+    return result
+
+
+def png_bytes(size=(320, 240)):
+    buf = io.BytesIO()
+    Image.new('L', size, 128).save(buf, 'PNG')
+    return buf.getvalue()
+
+
+def raster(height, width_bytes=72):
+    black = np.zeros((height, width_bytes * 8), dtype=bool)
+    black[::2] = True
+    return np.packbits(black, axis=1).tobytes()
+
+
+def wait_for_status(server, job_id, statuses, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status, body, _ = request(server, 'GET', f'/jobs/{job_id}')
+        assert status == 200
+        if body['status'] in statuses:
+            return body
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not reach {statuses}")
+
+
+def test_raster_job_is_printed(server, emulator):
+    status, body, _ = request(server, 'POST', '/jobs?width_bytes=72&height=50&copies=2',
+                              raster(50), 'application/octet-stream')
+    assert status == 202
+    assert body['status'] == 'queued'
+
+    done = wait_for_status(server, body['id'], ('done', 'failed'))
+    assert done['status'] == 'done', done['error']
+    pages = emulator.finish()
+    assert [page.size for page in pages] == [(576, 50 + 64)] * 2
+
+
+def test_raster_job_with_caption_adds_caption_area(server, emulator):
+    status, body, _ = request(server, 'POST', '/jobs?width_bytes=72&height=50&caption=hi',
+                              raster(50), 'application/octet-stream')
+    assert status == 202
+    assert wait_for_status(server, body['id'], ('done', 'failed'))['status'] == 'done'
+    assert emulator.finish()[0].size == (576, 50 + 120 + 64)
+
+
+def test_image_job_is_framed_and_printed(server, emulator):
+    status, body, _ = request(server, 'POST', '/jobs?caption=hello', png_bytes(), 'image/png')
+    assert status == 202
+    assert wait_for_status(server, body['id'], ('done', 'failed'))['status'] == 'done'
+    # 576 x 432 로 리사이즈 + 문구 영역 120 + 절단 전 급지 64
+    assert emulator.finish()[0].size == (576, 432 + 120 + 64)
+
+
+def test_image_job_does_not_write_to_cwd(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    status, body, _ = request(server, 'POST', '/jobs', png_bytes(), 'image/png')
+    assert status == 202
+    assert wait_for_status(server, body['id'], ('done', 'failed'))['status'] == 'done'
+    assert os.listdir(tmp_path) == []
+    assert os.listdir(server.work_dir) == []
+
+
+def test_job_list(server):
+    request(server, 'POST', '/jobs?width_bytes=72&height=10', raster(10), 'application/octet-stream')
+    status, body, _ = request(server, 'GET', '/jobs')
+    assert status == 200
+    assert [job['id'] for job in body['jobs']] == ['1']
+
+
+def test_missing_or_wrong_token_is_rejected(server):
+    assert request(server, 'GET', '/jobs', token=None)[0] == 401
+    assert request(server, 'GET', '/jobs', token='nope')[0] == 401
+    status, _, _ = request(server, 'POST', '/jobs', png_bytes(), 'image/png', token='nope')
+    assert status == 401
+    assert server.jobs == {}
+
+
+def test_wrong_token_large_body_gets_401_not_reset(server):
+    # 본문은 저장하지 않고 버리지만, 끝까지 읽어야 클라이언트가 RST 대신 401 을 받음
+    status, _, _ = request(server, 'POST', '/jobs?width_bytes=72&height=30000',
+                           raster(30000), 'application/octet-stream', token='nope')
+    assert status == 401
+    assert server.jobs == {}
+
+
+@pytest.mark.parametrize('path, body, content_type', [
+    ('/jobs?copies=0', png_bytes(), 'image/png'),
+    ('/jobs?copies=11', png_bytes(), 'image/png'),
+    ('/jobs?copies=x', png_bytes(), 'image/png'),
+    ('/jobs', b'not an image', 'image/png'),
+    ('/jobs', b'text', 'text/plain'),
+    ('/jobs?width_bytes=72', raster(10), 'application/octet-stream'),
+    ('/jobs?width_bytes=73&height=10', raster(10, 73), 'application/octet-stream'),
+    ('/jobs?width_bytes=72&height=11', raster(10), 'application/octet-stream'),
+    # 문구 영역 120 줄을 더하면 GS v 0 높이(16비트)를 넘음
+    ('/jobs?width_bytes=1&height=65500&caption=hi', raster(65500, 1), 'application/octet-stream'),
+])
+def test_invalid_jobs_are_rejected(server, path, body, content_type):
+    status, response, _ = request(server, 'POST', path, body, content_type)
+    assert status == 400, response
+    assert server.jobs == {}
+
+
+@pytest.mark.parametrize('size', [(20, 2400), (1, 100000)])
+def test_tall_narrow_image_is_rejected(server, emulator, size):
+    # 576 dots 폭으로 늘리면 GS v 0 높이(16비트)를 넘는 이미지
+    status, response, _ = request(server, 'POST', '/jobs', png_bytes(size), 'image/png')
+    assert status == 400, response
+    assert server.jobs == {}
+    assert emulator.dot_lines == 0
+
+
+def test_print_image_never_sends_truncated_height(tmp_path):
+    path = tmp_path / 'tall.png'
+    Image.new('L', (20, 2400), 255).save(path)
+    emulator = EscPosEmulator()
+    with pytest.raises(Exception, match="GS v 0"):
+        ThermalPrinter(port=emulator).print_image(str(path))
+    assert emulator.finish() == []
+    assert emulator.dot_lines == 0
+
+
+def test_too_many_pixels_is_rejected(server):
+    status, _, _ = request(server, 'POST', '/jobs', png_bytes((2000, 1000)), 'image/png')
+    assert status == 413
+
+
+def test_unknown_job_and_path(server):
+    assert request(server, 'GET', '/jobs/999')[0] == 404
+    assert request(server, 'GET', '/other')[0] == 404
+
+
+def test_unsupported_method(server):
+    assert request(server, 'DELETE', '/jobs')[0] == 405
+    assert request(server, 'PUT', '/jobs/1')[0] == 405
+
+
+def test_full_queue_returns_503_with_retry_after(server):
+    def submit():
+        return request(server, 'POST', '/jobs?width_bytes=72&height=10', raster(10), 'application/octet-stream')
+
+    # 프린터를 잡고 있어서 워커가 첫 작업에서 멈춰 있게 함 (max_queue=1)
+    with server.printer.lock:
+        first = submit()
+        wait_for_status(server, first[1]['id'], ('printing',))
+        second = submit()
+        # 소켓 버퍼보다 큰 본문도 끝까지 읽어서 버린 뒤 응답해야 클라이언트가 RST 대신 503 을 받음
+        status, body, headers = request(server, 'POST', '/jobs?width_bytes=72&height=30000',
+                                        raster(30000), 'application/octet-stream')
+
+    assert first[0] == 202 and second[0] == 202
+    assert status == 503
+    assert headers['Retry-After'] == '5'
+    assert wait_for_status(server, second[1]['id'], ('done', 'failed'))['status'] == 'done'
+
+
+def test_connection_limit(font_path):
+    server = PrintServer(ThermalPrinter(port=EscPosEmulator()), '127.0.0.1', 0, font_path, token=TOKEN,
+                         max_connections=1)
+    server.start()
+    try:
+        # 아무것도 보내지 않는 연결이 하나뿐인 자리를 차지함
+        with socket.create_connection(('127.0.0.1', server.port)):
+            time.sleep(0.2)
+            status, body, _ = request(server, 'GET', '/jobs')
+        assert status == 503, body
+        assert request(server, 'GET', '/jobs')[0] == 200
+    finally:
+        server.stop()
+
+
+def test_slow_headers_hit_one_overall_deadline(font_path):
+    server = PrintServer(ThermalPrinter(port=EscPosEmulator()), '127.0.0.1', 0, font_path, token=TOKEN,
+                         read_timeout=0.5)
+    server.start()
+    try:
+        with socket.create_connection(('127.0.0.1', server.port), timeout=5) as sock:
+            started = time.time()
+            sock.sendall(b'GET /jobs HTTP/1.1\r\n')
+            response = b''
+            # 줄마다 제한 시간 안에 보내도 전체 헤더 제한 시간에서 끊겨야 함
+            for i in range(20):
+                try:
+                    sock.sendall(f'X-Slow-{i}: 1\r\n'.encode())
+                except ConnectionError:
+                    break
+                sock.settimeout(0.2)
+                try:
+                    response = sock.recv(4096)
+                except socket.timeout:
+                    continue
+                break
+            elapsed = time.time() - started
+        assert response.startswith(b'HTTP/1.1 408'), response
+        assert elapsed < 2
+    finally:
+        server.stop()
+
+
+def test_too_many_header_lines(server):
+    with socket.create_connection(('127.0.0.1', server.port), timeout=5) as sock:
+        sock.sendall(b'GET /jobs HTTP/1.1\r\n' + b''.join(f'X-H-{i}: 1\r\n'.encode() for i in range(200)) + b'\r\n')
+        assert sock.recv(4096).startswith(b'HTTP/1.1 400')
+
+
+def test_start_fails_when_port_is_in_use(server, font_path):
+    other = PrintServer(ThermalPrinter(port=EscPosEmulator()), '127.0.0.1', server.port, font_path, token=TOKEN)
+    with pytest.raises(Exception, match="시작 실패"):
+        other.start()
+    assert not os.path.exists(other.work_dir)
+
+
+def test_token_is_required(font_path):
+    with pytest.raises(Exception):
+        PrintServer(ThermalPrinter(port=EscPosEmulator()), token='')
+
+
+def test_stop_removes_work_dir(server):
+    server.stop()
+    assert not os.path.exists(server.work_dir)
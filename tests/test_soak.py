@@ -0,0 +1,103 @@
+import argparse
+
+import pytest
+
+pytest.importorskip('cv2')
+pytest.importorskip('PyQt5')
+
+import soak
+
+
+def samples(values, key='rss', start=1):
+    return [{'cycle': start + i, key: value} for i, value in enumerate(values)]
+
+
+def limits(**overrides):
+    args = soak.parse_args([])
+    return argparse.Namespace(**{**vars(args), **overrides})
+
+
+def growth(rss_slope=0.0, traced_slope=0.0, fd_growth=0, thread_growth=0):
+    return {'rss_slope': rss_slope, 'traced_slope': traced_slope,
+            'fd_growth': fd_growth, 'thread_growth': thread_growth}
+
+
+def test_slope_of_linear_growth():
+    assert soak.slope(samples([100, 200, 300, 400]), 'rss') == pytest.approx(100)
+    assert soak.slope(samples([100, 200, 300], start=10), 'rss') == pytest.approx(100)
+    assert soak.slope(samples([500, 400, 300]), 'rss') == pytest.approx(-100)
+
+
+def test_slope_ignores_noise_around_a_flat_line():
+    # 양 끝 표본 차이(-10 / 5 사이클)나 최댓값-최솟값(20)이 아니라 전체 추세로 판단
+    assert abs(soak.slope(samples([100, 110, 90, 100, 110, 90]), 'rss')) < 2
+
+
+def test_slope_needs_two_points_with_different_cycles():
+    assert soak.slope([], 'rss') == 0.0
+    assert soak.slope(samples([100]), 'rss') == 0.0
+    assert soak.slope([{'cycle': 5, 'rss': 1}, {'cycle': 5, 'rss': 9}], 'rss') == 0.0
+    # RSS 를 읽지 못한 표본(None)은 건너뜀
+    assert soak.slope(samples([None, 100, None, 300]), 'rss') == pytest.approx(100)
+
+
+def test_measure_growth_skips_first_traced_cycle():
+    sampled = [{'cycle': 1, 'rss': 1000, 'fds': 10, 'threads': 5},
+               {'cycle': 2, 'rss': 3000, 'fds': 12, 'threads': 5}]
+    # 첫 추적 사이클은 캐시가 채워지는 구간이라 큰 값이어도 기울기에 넣지 않음
+    traced = samples([10 ** 9, 100, 100, 100], key='traced')
+    assert soak.measure_growth(sampled, traced) == growth(rss_slope=2000, fd_growth=2)
+
+
+def test_measure_growth_without_fd_count():
+    sampled = [{'cycle': 1, 'rss': None, 'fds': None, 'threads': 5},
+               {'cycle': 2, 'rss': None, 'fds': None, 'threads': 4}]
+    assert soak.measure_growth(sampled, []) == growth(fd_growth=None, thread_growth=-1)
+
+
+def test_check_limits_passes_within_limits():
+    assert soak.check_limits(growth(rss_slope=4096, traced_slope=1024), limits()) == []
+    assert soak.check_limits(growth(fd_growth=None), limits()) == []
+
+
+@pytest.mark.parametrize('measured, expected', [
+    (growth(rss_slope=4097), 'RSS'),
+    (growth(traced_slope=1025), 'tracemalloc'),
+    (growth(fd_growth=1), '파일 디스크립터'),
+    (growth(thread_growth=1), '스레드'),
+])
+def test_check_limits_reports_each_failure(measured, expected):
+    failures = soak.check_limits(measured, limits())
+    assert len(failures) == 1
+    assert expected in failures[0]
+
+
+def test_check_limits_uses_configured_limits():
+    assert soak.check_limits(growth(fd_growth=2, thread_growth=3),
+                             limits(max_fd_growth=2, max_thread_growth=3)) == []
+
+
+@pytest.mark.parametrize('argv', [
+    ['--cycles', '10', '--warmup', '5', '--trace-cycles', '5'],
+    ['--cycles', '10', '--warmup', '1', '--trace-cycles', '1'],
+])
+def test_invalid_cycle_counts_exit_with_2(argv):
+    assert soak.main(argv) == 2
+
+
+def test_main_smoke(font_path, tmp_path):
+    # tracemalloc 을 켠 두 사이클이 대부분의 시간(수십 초)을 차지함
+    csv_path = tmp_path / 'samples.csv'
+    argv = ['--cycles', '4', '--warmup', '1', '--sample-every', '1', '--trace-cycles', '2',
+            '--font', font_path, '--csv', str(csv_path)]
+    # 몇 사이클로는 증가량이 의미 없으므로 기준을 느슨하게 해서 통과, 아주 엄격하게 해서 실패를 확인
+    loose = ['--max-rss-per-cycle', '1e12', '--max-traced-per-cycle', '1e12',
+             '--max-fd-growth', '1000', '--max-thread-growth', '1000']
+    assert soak.main(argv + loose) == 0
+    lines = csv_path.read_text().splitlines()
+    assert lines[0] == 'cycle,rss,fds,threads'
+    assert [line.split(',')[0] for line in lines[1:]] == ['1', '2']
+
+    strict = ['--cycles', '2', '--warmup', '1', '--trace-cycles', '0', '--font', font_path,
+              '--max-rss-per-cycle=-1e12']
+    assert soak.main(strict) == 1
@@ -2,25 +2,34 @@ from PIL import Image, ImageEnhance, ImageFilter, ImageOps
 import numpy as np
 import cv2
 import serial
+import threading
 import time
 
 class ThermalPrinter:
     def __init__(self, port='COM7', baudrate=115200):
         self.max_width = 576  # 72mm * 8dots/mm = 576 dots
+        self.lock = threading.Lock()  # 키오스크 UI 와 원격 작업 서버가 같은 프린터를 공유
         self._initialize_printer(port, baudrate)
     
     def _initialize_printer(self, port, baudrate):
-        """프린터를 초기화합니다."""
-        self.printer_dev = serial.Serial(
-            port=port,
-            baudrate=baudrate,
-            bytesize=serial.EIGHTBITS,
-            parity=serial.PARITY_NONE,
-            stopbits=serial.STOPBITS_ONE,
-            timeout=30,
-            write_timeout=30,
-            xonxoff=True
-        )
+        """프린터를 초기화합니다.
+
+        port 에는 'COM7' 같은 포트 이름 외에 'loop://' 같은 pyserial URL 이나
+        이미 열린 시리얼 호환 객체(예: escpos_emulator.EscPosEmulator)도 사용할 수 있습니다.
+        """
+        if isinstance(port, str):
+            self.printer_dev = serial.serial_for_url(
+                port,
+                baudrate=baudrate,
+                bytesize=serial.EIGHTBITS,
+                parity=serial.PARITY_NONE,
+                stopbits=serial.STOPBITS_ONE,
+                timeout=30,
+                write_timeout=30,
+                xonxoff=True
+            )
+        else:
+            self.printer_dev = port
         
         # 프린터 초기화 명령
         commands = [
@@ -54,11 +63,26 @@ class ThermalPrinter:
 
     def print_image(self, image_path, copies=1):
         try:
-            for copy in range(copies):
-                self._print_single_image(image_path)
-                self.cut_paper()
-                if copy < copies - 1:
-                    time.sleep(1)
+            with self.lock:
+                for copy in range(copies):
+                    self._print_single_image(image_path)
+                    self.cut_paper()
+                    if copy < copies - 1:
+                        self._sleep(1)
+        except Exception as e:
+            raise Exception(f"인쇄 중 오류 발생: {str(e)}")
+
+    def print_raster(self, data, width_bytes, height, copies=1):
+        """이미 1비트로 변환된 래스터 데이터(GS v 0 형식, 1 = 검정)를 그대로 인쇄합니다."""
+        if len(data) != width_bytes * height:
+            raise Exception(f"래스터 크기 불일치: {len(data)} != {width_bytes} x {height}")
+        try:
+            with self.lock:
+                for copy in range(copies):
+                    self._send_raster(data, width_bytes, height)
+                    self.cut_paper()
+                    if copy < copies - 1:
+                        self._sleep(1)
         except Exception as e:
             raise Exception(f"인쇄 중 오류 발생: {str(e)}")
 
@@ -78,6 +102,8 @@ class ThermalPrinter:
             target_width = self.max_width
             orig_w, orig_h = img.size
             target_height = int((orig_h * target_width) / orig_w)
+            width_bytes = (target_width + 7) // 8
+            self._check_raster_size(width_bytes, target_height)  # 리사이즈 전에 미리 확인
             
             # 2단계 리사이징으로 디테일 보존
             intermediate_w = int(target_width * 1.5)
@@ -89,19 +115,7 @@ class ThermalPrinter:
             img = img.convert('1', dither=Image.Dither.FLOYDSTEINBERG)
             pixels = np.array(img)
             
-            # 프린터 명령어 전송
-            width_bytes = (target_width + 7) // 8
-            
-            # GS v 0 command
-            self._write_bytes([0x1D, 0x76, 0x30, 0])
-            self._write_bytes([
-                width_bytes & 0xFF,
-                (width_bytes >> 8) & 0xFF,
-                target_height & 0xFF,
-                (target_height >> 8) & 0xFF
-            ])
-            
-            # 이미지 데이터 전송
+            # 이미지 데이터 변환
             image_data = []
             for y in range(target_height):
                 for x in range(0, target_width, 8):
@@ -111,14 +125,41 @@ class ThermalPrinter:
                             byte_val |= (1 << (7 - bit))
                     image_data.append(byte_val)
             
-            self._write_bytes(image_data)
-            self._write_bytes([0x0A] * 4)
+            self._send_raster(image_data, width_bytes, target_height)
+
+    def _check_raster_size(self, width_bytes, height):
+        if not 0 < width_bytes <= 0xFFFF or not 0 < height <= 0xFFFF:
+            # GS v 0 의 폭/높이 필드는 16비트라서 넘으면 잘려서 나머지가 쓰레기 바이트로 인쇄됨
+            raise Exception(f"래스터 크기가 GS v 0 범위를 벗어났습니다: {width_bytes} x {height}")
+
+    def _send_raster(self, image_data, width_bytes, height):
+        self._check_raster_size(width_bytes, height)
+        
+        # GS v 0 command
+        self._write_bytes([0x1D, 0x76, 0x30, 0])
+        self._write_bytes([
+            width_bytes & 0xFF,
+            (width_bytes >> 8) & 0xFF,
+            height & 0xFF,
+            (height >> 8) & 0xFF
+        ])
+        
+        # 이미지 데이터 전송
+        self._write_bytes(image_data)
+        self._write_bytes([0x0A] * 4)
+
+    def _sleep(self, seconds):
+        if hasattr(self.printer_dev, 'idle'):
+            # 에뮬레이터: 실제로 기다리지 않고 대기 시간만 인쇄 시간 추정에 반영
+            self.printer_dev.idle(seconds)
+        else:
+            time.sleep(seconds)
 
     def cut_paper(self):
         self._write_bytes([0x0A] * 6)
-        time.sleep(1)
+        self._sleep(1)
         self._write_bytes([0x1D, 0x56, 0x41, 0x40])
-        time.sleep(0.5)
+        self._sleep(0.5)
         
     def __del__(self):
         if hasattr(self, 'printer_dev') and self.printer_dev and self.printer_dev.is_open: